@@ -1,23 +1,50 @@
-from flask import Flask, jsonify, request
+from flask import Flask, request
 from flask_cors import CORS
-import psycopg2
+import orjson
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 import os
+import random
 import logging
+from prometheus_client import Counter
 from prometheus_flask_exporter import PrometheusMetrics
-from datetime import datetime
+from datetime import datetime, timezone
 import socket
+import threading
 import time
+import weakref
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Service identity; none of these change during a worker's lifetime
+SERVICE_NAME = 'python-service'
+VERSION = '1.0.0'
+HOSTNAME = socket.gethostname()
+ENVIRONMENT = os.environ.get('ENVIRONMENT', 'dev')
+
 app = Flask(__name__)
 CORS(app)
 
-# Initialize Prometheus metrics
-metrics = PrometheusMetrics(app)
-metrics.info('python_service_info', 'Python service info', version='1.0.0')
+# Initialize Prometheus metrics; default request metrics are labelled by
+# endpoint name only to keep per-request label formatting cheap
+metrics = PrometheusMetrics(app, group_by='endpoint', default_labels={})
+metrics.info('python_service_info', 'Python service info', version=VERSION)
+
+# Pre-built label-free counters, incremented directly in the handlers
+HEALTH_CHECK_COUNTER = Counter('health_check_total', 'Total health check requests')
+API_DATA_COUNTER = Counter('api_data_requests', 'Total API data requests')
+
+JSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+def json_response(obj, status=200):
+    """Serialize obj with orjson; datetimes are emitted as ISO 8601 natively"""
+    return app.response_class(
+        orjson.dumps(obj, option=JSON_OPTIONS),
+        status=status,
+        mimetype='application/json'
+    )
 
 # Database configuration
 DB_CONFIG = {
@@ -28,15 +55,66 @@ DB_CONFIG = {
     'password': os.environ.get('DB_PASSWORD', 'admin123')
 }
 
+# Rows fetched per round trip when streaming query results
+DATA_BATCH_SIZE = 100
+
+class RetainingConnectionPool(ThreadedConnectionPool):
+    """ThreadedConnectionPool that keeps every returned connection for reuse.
+
+    psycopg2 closes a returned connection once minconn are already idle. Only
+    minconn connections are opened up front, so raising it to maxconn after
+    construction keeps connecting on demand but retains up to maxconn idle.
+    """
+
+    def __init__(self, minconn, maxconn, *args, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self.minconn = self.maxconn
+
+# Connection pool shared by all request threads in this worker.
+# Created lazily so an unreachable database does not fail the import.
+DB_POOL_MAX = 10
+db_pool = None
+db_pool_lock = threading.Lock()
+
+def get_db_pool():
+    """Return the worker's connection pool, creating it on first use"""
+    global db_pool
+    if db_pool is None:
+        with db_pool_lock:
+            if db_pool is None:
+                db_pool = RetainingConnectionPool(minconn=1, maxconn=DB_POOL_MAX, **DB_CONFIG)
+    return db_pool
+
 def get_db_connection():
-    """Create database connection"""
+    """Borrow a database connection from the pool"""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
+        return get_db_pool().getconn()
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         return None
 
+def release_db(conn):
+    """Return a connection to the pool, discarding it if it was closed"""
+    try:
+        get_db_pool().putconn(conn, close=bool(conn.closed))
+    except Exception as e:
+        logger.warning(f"Failed to release database connection: {e}")
+
+# Pooled connections that already hold the prepared health_checks INSERT.
+# Prepared statements live for the session, so each connection prepares once.
+prepared_conns = weakref.WeakSet()
+
+def prepare_health_insert(conn, cursor):
+    """Prepare the health_checks INSERT on this connection if not done yet"""
+    if conn in prepared_conns:
+        return
+    cursor.execute(
+        "PREPARE health_insert (varchar, timestamp, varchar, varchar) AS "
+        "INSERT INTO health_checks (service, timestamp, status, hostname) VALUES ($1, $2, $3, $4)"
+    )
+    prepared_conns.add(conn)
+    logger.debug(f"Prepared health_insert on backend {conn.get_backend_pid()}")
+
 def init_db(retries=8, delay_sec=2):
     """Initialize required database table with retries and backoff.
     Creates health_checks if it does not exist.
@@ -57,100 +135,119 @@ def init_db(retries=8, delay_sec=2):
                         hostname VARCHAR(100)
                     )
                 ''')
+                # Serves the ORDER BY timestamp DESC LIMIT query in /api/data
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_health_checks_timestamp ON health_checks (timestamp DESC)"
+                )
                 conn.commit()
                 cursor.close()
-                conn.close()
                 logger.info("Database initialized successfully")
                 return True
             except Exception as e:
                 logger.error(f"Database initialization attempt {attempt} failed: {e}")
-                try:
-                    conn.close()
-                except Exception:
-                    pass
+            finally:
+                release_db(conn)
         else:
             logger.warning(f"Database connection attempt {attempt} failed")
         if attempt < retries:
-            sleep_for = delay_sec * attempt
-            logger.info(f"Retrying database init in {sleep_for} seconds (attempt {attempt}/{retries})")
+            # Capped exponential backoff with jitter so restarting pods do not retry in lockstep
+            sleep_for = min(30, delay_sec * (2 ** (attempt - 1))) + random.uniform(0, 1)
+            logger.info(f"Retrying database init in {sleep_for:.1f} seconds (attempt {attempt}/{retries})")
             time.sleep(sleep_for)
     logger.error("Database initialization failed after all retries")
     return False
 
 @app.route('/health', methods=['GET'])
-@metrics.counter('health_check_total', 'Total health check requests')
 def health():
     """Health check endpoint"""
-    hostname = socket.gethostname()
-    timestamp = datetime.now()
+    HEALTH_CHECK_COUNTER.inc()
+    # Naive UTC: stored as-is in the TIMESTAMP column regardless of the session
+    # time zone, and orjson (OPT_NAIVE_UTC) renders it with a +00:00 offset
+    timestamp = datetime.now(timezone.utc).replace(tzinfo=None)
     
     # Log health check to database
     conn = get_db_connection()
     if conn:
         try:
             cursor = conn.cursor()
+            prepare_health_insert(conn, cursor)
             cursor.execute(
-                "INSERT INTO health_checks (service, timestamp, status, hostname) VALUES (%s, %s, %s, %s)",
-                ('python-service', timestamp, 'healthy', hostname)
+                "EXECUTE health_insert (%s, %s, %s, %s)",
+                (SERVICE_NAME, timestamp, 'healthy', HOSTNAME)
             )
             conn.commit()
             cursor.close()
-            conn.close()
             db_status = "connected"
         except Exception as e:
             logger.error(f"Failed to log health check: {e}")
             db_status = "error"
+        finally:
+            release_db(conn)
     else:
         db_status = "disconnected"
     
-    return jsonify({
+    return json_response({
         'status': 'healthy',
-        'service': 'python-service',
-        'version': '1.0.0',
-        'timestamp': timestamp.isoformat(),
-        'hostname': hostname,
+        'service': SERVICE_NAME,
+        'version': VERSION,
+        'timestamp': timestamp,
+        'hostname': HOSTNAME,
         'database': db_status,
-        'environment': os.environ.get('ENVIRONMENT', 'dev')
-    }), 200
+        'environment': ENVIRONMENT
+    })
 
 @app.route('/api/data', methods=['GET'])
-@metrics.counter('api_data_requests', 'Total API data requests')
 def get_data():
-    """Get recent health checks from database"""
+    """Get recent health checks from database, streamed in batches"""
+    API_DATA_COUNTER.inc()
     conn = get_db_connection()
     if not conn:
-        return jsonify({'error': 'Database connection failed'}), 500
+        return json_response({'error': 'Database connection failed'}, 500)
     
     try:
-        cursor = conn.cursor()
+        # Named (server-side) cursor: rows are transferred in batches instead of
+        # being materialized in full on the client
+        cursor = conn.cursor(name='stream_data', cursor_factory=RealDictCursor)
         cursor.execute(
-            "SELECT * FROM health_checks ORDER BY timestamp DESC LIMIT 10"
+            "SELECT id, service, timestamp, status, hostname FROM health_checks ORDER BY timestamp DESC LIMIT 10"
         )
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        data = []
-        for row in rows:
-            data.append({
-                'id': row[0],
-                'service': row[1],
-                'timestamp': row[2].isoformat() if row[2] else None,
-                'status': row[3],
-                'hostname': row[4]
-            })
-        
-        return jsonify({'data': data}), 200
+        # Fetch the first batch eagerly so query errors still produce a 500
+        batch = cursor.fetchmany(DATA_BATCH_SIZE)
     except Exception as e:
         logger.error(f"Failed to fetch data: {e}")
-        return jsonify({'error': str(e)}), 500
+        release_db(conn)
+        return json_response({'error': str(e)}, 500)
+    
+    def generate(batch):
+        try:
+            yield b'{"data":['
+            separator = b''
+            while batch:
+                yield separator + b','.join(orjson.dumps(row, option=JSON_OPTIONS) for row in batch)
+                separator = b','
+                # A short batch means the cursor is exhausted; skip the empty FETCH
+                if len(batch) < DATA_BATCH_SIZE:
+                    break
+                batch = cursor.fetchmany(DATA_BATCH_SIZE)
+            yield b']}'
+        except Exception as e:
+            logger.error(f"Failed to stream data: {e}")
+            # Abort the response instead of ending a truncated body cleanly
+            raise
+    
+    # Return the connection once the server has finished with the response,
+    # even if the client disconnects before the stream is consumed. The pool's
+    # rollback on putconn also closes the server-side cursor.
+    response = app.response_class(generate(batch), mimetype='application/json')
+    response.call_on_close(lambda: release_db(conn))
+    return response
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Get service statistics"""
     conn = get_db_connection()
     if not conn:
-        return jsonify({'error': 'Database connection failed'}), 500
+        return json_response({'error': 'Database connection failed'}, 500)
     
     try:
         cursor = conn.cursor()
@@ -159,31 +256,33 @@ def get_stats():
         )
         rows = cursor.fetchall()
         cursor.close()
-        conn.close()
         
         stats = {}
         for row in rows:
             stats[row[1]] = row[0]
         
-        return jsonify({'stats': stats}), 200
+        return json_response({'stats': stats})
     except Exception as e:
         logger.error(f"Failed to fetch stats: {e}")
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
+    finally:
+        release_db(conn)
 
 @app.route('/', methods=['GET'])
 def index():
     """Root endpoint"""
-    return jsonify({
+    return json_response({
         'message': 'Python Service API',
         'endpoints': ['/health', '/api/data', '/api/stats', '/metrics']
-    }), 200
-
-# Ensure DB is initialized when the module is loaded (covers gunicorn workers too)
-# Block until DB initialized to guarantee required tables exist before the service starts.
-# This prevents race conditions where the app starts but required tables are missing.
-while not init_db(retries=8, delay_sec=3):
-    logger.warning("Database not ready or migration failed; retrying in 5 seconds")
-    time.sleep(5)
+    })
+
+@app.cli.command('init-db')
+def cli_init_db():
+    """Create required tables; run once per rollout (Kubernetes initContainer).
+    Exits non-zero on failure so the init container is restarted.
+    """
+    if not init_db(retries=8, delay_sec=3):
+        raise SystemExit(1)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
@@ -0,0 +1,19 @@
+"""Gunicorn configuration for the Python service.
+
+gevent workers let a single process overlap many requests that are waiting on
+PostgreSQL. worker_connections matches DB_POOL_MAX in app.py, whose pool keeps
+every returned connection open for reuse. Each worker therefore serves at most
+that many concurrent requests from at most that many long-lived connections.
+"""
+
+bind = '0.0.0.0:5000'
+worker_class = 'gevent'
+workers = 2
+worker_connections = 10
+timeout = 60
+
+
+def post_worker_init(worker):
+    """Make psycopg2 yield to other greenlets while waiting on the database"""
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()